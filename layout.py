@@ -1,36 +1,59 @@
 import logging
+import math
 from abc import ABC, abstractmethod
-from enum import Enum
-from typing import List, NamedTuple, Tuple
+from array import array
+from dataclasses import dataclass, replace as _dataclass_replace
+from enum import IntEnum
+from typing import List, Tuple
 
 from point import Point as P
 
 logger = logging.getLogger(__name__)
 
 
-class Align(str, Enum):
-    TOP = "top"
-    CENTER = "center"
-    BOTTOM = "bottom"
-    RIGHT = "right"
-    LEFT = "left"
-
-
-class Anchor(str, Enum):
-    TOP_LEFT = "la"
-    TOP_MIDDLE = "ma"
-    TOP_RIGHT = "ra"
-
-    MIDDLE_LEFT = "lm"
-    MIDDLE_MIDDLE = "mm"
-    MIDDLE_RIGHT = "rm"
-
-    BOTTOM_LEFT = "ld"
-    BOTTOM_MIDDLE = "md"
-    BOTTOM_RIGHT = "rd"
-
-
-class Style(NamedTuple):
+# IntEnums so the comparisons in hot render loops are single integer
+# compares instead of str.__eq__ dispatch
+class Align(IntEnum):
+    TOP = 0
+    CENTER = 1
+    BOTTOM = 2
+    RIGHT = 3
+    LEFT = 4
+
+
+class Anchor(IntEnum):
+    TOP_LEFT = 0
+    TOP_MIDDLE = 1
+    TOP_RIGHT = 2
+
+    MIDDLE_LEFT = 3
+    MIDDLE_MIDDLE = 4
+    MIDDLE_RIGHT = 5
+
+    BOTTOM_LEFT = 6
+    BOTTOM_MIDDLE = 7
+    BOTTOM_RIGHT = 8
+
+
+# The two-letter PIL anchor codes the renderers consult
+Anchor._to_renderer = {
+    Anchor.TOP_LEFT: "la",
+    Anchor.TOP_MIDDLE: "ma",
+    Anchor.TOP_RIGHT: "ra",
+    Anchor.MIDDLE_LEFT: "lm",
+    Anchor.MIDDLE_MIDDLE: "mm",
+    Anchor.MIDDLE_RIGHT: "rm",
+    Anchor.BOTTOM_LEFT: "ld",
+    Anchor.BOTTOM_MIDDLE: "md",
+    Anchor.BOTTOM_RIGHT: "rd",
+}
+
+
+# Frozen with slots so attribute reads in hot paths are fixed-offset
+# loads; equal styles are interned to one canonical instance so
+# id()-keyed caches see a single object per distinct style
+@dataclass(frozen=True, slots=True)
+class Style:
     padding: int = 10
     font: str = 'Roboto-Regular.ttf'
     font_size: int = 32
@@ -39,6 +62,18 @@ class Style(NamedTuple):
     fill_color: str = "white"
     font_color: str = "black"
 
+    @classmethod
+    def intern(cls, **fields) -> 'Style':
+        style = cls(**fields)
+        return _style_intern.setdefault(style, style)
+
+    def _replace(self, **changes) -> 'Style':
+        style = _dataclass_replace(self, **changes)
+        return _style_intern.setdefault(style, style)
+
+
+_style_intern: dict = {}
+
 
 default_style = Style()
 
@@ -46,9 +81,46 @@ default_style = Style()
 def set_style(style):
     global default_style
     default_style = style
+    _text_bbox_cache.clear()
     logger.debug('Default style: %s', repr(style))
 
 
+# Text measurement involves font shaping and is far more expensive than
+# a dict lookup, so memoize it per (text, font, size, renderer). The
+# renderer is kept in the entry to pin its id: otherwise a new renderer
+# allocated at a freed renderer's address would read its measurements.
+_text_bbox_cache: dict = {}
+_TEXT_BBOX_CACHE_MAX = 4096
+
+
+def _cached_text_bbox(renderer, text: str, style: Style):
+    key = (text, style.font, style.font_size, id(renderer))
+    entry = _text_bbox_cache.get(key)
+    if entry is None:
+        if len(_text_bbox_cache) >= _TEXT_BBOX_CACHE_MAX:
+            _text_bbox_cache.clear()
+        entry = (renderer, renderer.text_bbox(text, style))
+        _text_bbox_cache[key] = entry
+
+    return entry[1]
+
+
+# Styles are immutable, so single-field variants can be shared instead
+# of allocating a fresh NamedTuple at every call site. The base style
+# is kept in the value to pin its id for the lifetime of the entry.
+_style_replace_cache: dict = {}
+
+
+def _replace_style(style: Style, field: str, value) -> Style:
+    key = (id(style), field, value)
+    entry = _style_replace_cache.get(key)
+    if entry is None:
+        entry = (style, style._replace(**{field: value}))
+        _style_replace_cache[key] = entry
+
+    return entry[1]
+
+
 class Renderer(ABC):
     @abstractmethod
     def rectangle(self, p1, p2, style: Style):
@@ -66,23 +138,82 @@ class Renderer(ABC):
     def line(self, p1, p2, style: Style):
         raise NotImplementedError()
 
+    def lines(self, p1s, p2s, style: Style):
+        # Batched entry point so callers emitting many segments pay one
+        # dispatch instead of one per segment; renderers can override
+        # this to skip per-segment style setup
+        for p1, p2 in zip(p1s, p2s):
+            self.line(p1, p2, style)
+
     @abstractmethod
     def set_dimensions(self, dim):
         raise NotImplementedError()
 
 
+# Op codes for the flattened render list built by Object.flatten
+_OP_RECT = 0
+_OP_TEXT = 1
+_OP_LINE = 2
+_OP_LINES = 3
+
+
+# A Renderer that records draw calls as flat ops instead of drawing,
+# forwarding measurement queries to the real renderer
+class _OpRecorder(Renderer):
+    __slots__ = ('renderer', 'ops')
+
+    def __init__(self, renderer: Renderer, ops: list):
+        self.renderer = renderer
+        self.ops = ops
+
+    def rectangle(self, p1, p2, style: Style):
+        self.ops.append((_OP_RECT, p1, p2, style, None))
+
+    def text(self, text: str, p, style: Style):
+        self.ops.append((_OP_TEXT, p, None, style, text))
+
+    def text_bbox(self, text: str, style: Style) -> Tuple[int, int, int, int]:
+        return self.renderer.text_bbox(text, style)
+
+    def line(self, p1, p2, style: Style):
+        self.ops.append((_OP_LINE, p1, p2, style, None))
+
+    def lines(self, p1s, p2s, style: Style):
+        # Keep the batch as one op so replay preserves the single
+        # renderer.lines dispatch instead of decaying to per-segment
+        # line calls
+        self.ops.append((_OP_LINES, p1s, p2s, style, None))
+
+    def set_dimensions(self, dim):
+        self.renderer.set_dimensions(dim)
+
+
 class Object:
+    __slots__ = (
+        '_style', '_w', '_h', '_w_dirty', '_h_dirty', '_child_objs',
+        '_child_offx', '_child_offy', 'parent', '_render_fn'
+    )
+
     def __init__(self, width=None, height=None, style=None, **kwargs):
         if not style:
             style = default_style
 
         if kwargs:
             style = style._replace(**kwargs)
-        self.style = style
+        self._style = style
         self._w = width
         self._h = height
-        self.children: List[Tuple[Object, P]] = []
+        self._w_dirty = True
+        self._h_dirty = True
+        # Children are stored SoA-style: the offset streams live in
+        # typed arrays so the layout loops walk compact int buffers
+        self._child_objs: List[Object] = []
+        self._child_offx = array('i')
+        self._child_offy = array('i')
         self.parent = None
+        # Bind the node's render implementation once so the traversal
+        # driver skips the MRO lookup on every visit
+        self._render_fn = self._render_self
 
     @property
     def width(self) -> int:
@@ -92,6 +223,8 @@ class Object:
     @width.setter
     def width(self, val):
         self._w = val
+        self._w_dirty = False
+        self._mark_ancestors_dirty()
 
     @property
     def height(self) -> int:
@@ -101,134 +234,310 @@ class Object:
     @height.setter
     def height(self, val):
         self._h = val
+        self._h_dirty = False
+        self._mark_ancestors_dirty()
+
+    @property
+    def style(self) -> Style:
+        return self._style
+
+    @style.setter
+    def style(self, val):
+        self._style = val
+        self._style_changed()
+        self._mark_ancestors_dirty()
+
+    def _style_changed(self):
+        # Hook for subclasses that derive render state from the style
+        pass
+
+    def _mark_ancestors_dirty(self):
+        # Cached dimensions anywhere up the tree are now stale; Canvas
+        # also keys its flattened op list off these flags
+        node = self.parent
+        while node is not None:
+            node._w_dirty = True
+            node._h_dirty = True
+            node = node.parent
 
     def add(self, obj, pos=P(0, 0)):
-        self.children.append((obj, pos))
+        self._child_objs.append(obj)
+        self._child_offx.append(pos[0])
+        self._child_offy.append(pos[1])
         obj.parent = self
 
+        self._w_dirty = True
+        self._h_dirty = True
+        self._mark_ancestors_dirty()
+
     def prepare(self, renderer: Renderer):
-        for (obj, _) in self.children:
-            obj.prepare(renderer)
+        # Iterative traversal to avoid per-node Python frames; children
+        # are prepared before their parents, matching the effect order
+        # of the old recursion
+        stack = [self]
+        order = []
+        while stack:
+            obj = stack.pop()
+            order.append(obj)
+            stack.extend(obj._child_objs)
+
+        for obj in reversed(order):
+            obj._prepare_self(renderer)
+
+    def _prepare_self(self, renderer: Renderer):
+        pass
 
     def render(self, renderer: Renderer, pos=(0, 0)):
+        # Iterative DFS driver: each node emits its own draw calls in
+        # _render_self and returns its child placements for the stack
+        stack = [(self, pos)]
+        while stack:
+            obj, p = stack.pop()
+            children = obj._render_fn(renderer, p)
+            if children:
+                stack.extend(reversed(children))
+
+    def _render_self(self, renderer: Renderer, pos):
         x, y = pos
-        for (obj, offset) in self.children:
-            logger.debug('%s %s', obj, offset)
-            offx, offy = offset
-            obj.render(renderer, P(x + offx, y + offy))
+        objs = self._child_objs
+        offx = self._child_offx
+        offy = self._child_offy
+        _dbg = logger.isEnabledFor(logging.DEBUG)
+        placed = []
+        for i in range(len(objs)):
+            if _dbg:
+                logger.debug('%s %s %s', objs[i], offx[i], offy[i])
+            placed.append((objs[i], (x + offx[i], y + offy[i])))
+
+        return placed
+
+    def flatten(self, renderer: Renderer, ops: list, pos=(0, 0)):
+        self.render(_OpRecorder(renderer, ops), pos)
 
     def __str__(self):
         return f"{type(self).__name__}({self._w}, {self._h})"
 
 
 class VLayout(Object):
+    __slots__ = ('align', '_uniform', '_uniform_w')
+
     def __init__(self, align=Align.CENTER, **kwargs):
         super().__init__(**kwargs)
         self.align = align
+        self._uniform = False
+        self._uniform_w = None
+
+    def _prepare_self(self, renderer: Renderer):
+        # prepare() visits children before parents, so these reads fill
+        # the dimension caches bottom-up; left to the getters, a deep
+        # chain would recompute child-to-child on first use and hit the
+        # recursion limit
+        _ = self.width
+        _ = self.height
+
+        # In uniform stacks (tables, columns) every child centers to the
+        # same x, so render can skip the per-child centering math
+        if self._child_objs:
+            w = self._child_objs[0].width
+            self._uniform = all(obj.width == w for obj in self._child_objs)
+            self._uniform_w = w
+        else:
+            self._uniform = False
 
     @property
     def width(self) -> int:
+        if not self._w_dirty:
+            return self._w
+
         self._w = 0
-        for (obj, offset) in self.children:
-            offx, _ = offset
+        for obj, offx in zip(self._child_objs, self._child_offx):
             self._w = max(self._w, obj.width + offx)
 
+        self._w_dirty = False
         return self._w
 
     @width.setter
     def width(self, val):
         self._w = val
+        self._w_dirty = False
+        self._mark_ancestors_dirty()
 
     @property
     def height(self) -> int:
+        if not self._h_dirty:
+            return self._h
+
         self._h = 0
-        for (obj, offset) in self.children:
-            _, offy = offset
+        for obj, offy in zip(self._child_objs, self._child_offy):
             self._h += obj.height + offy
 
+        self._h_dirty = False
         return self._h
 
     @height.setter
     def height(self, val):
         self._h = val
+        self._h_dirty = False
+        self._mark_ancestors_dirty()
 
-    def render(self, renderer: Renderer, pos=(0, 0)):
-        logger.debug('%s %s', self, pos)
+    def _render_self(self, renderer: Renderer, pos):
+        _dbg = logger.isEnabledFor(logging.DEBUG)
+        if _dbg:
+            logger.debug('%s %s', self, pos)
         x, y = pos
         # TODO: implement the centering logic better
         # TODO: if align == Align.CENTER:
         centerx = x + (self.width // 2)
-        logger.debug('center: %s', centerx)
-        for (obj, offset) in self.children:
-            logger.debug('%s %s', obj, offset)
-            offx, offy = offset
-
+        if _dbg:
+            logger.debug('center: %s', centerx)
+
+        if self._uniform:
+            # All children share a width, so they all center to x0; the
+            # x offset cancels out of the centering math entirely
+            x0 = centerx - (self._uniform_w // 2)
+            placed = []
+            for obj, offy in zip(self._child_objs, self._child_offy):
+                placed.append((obj, (x0, y + offy)))
+                y += obj.height + offy
+
+            return placed
+
+        placed = []
+        for obj, offx, offy in zip(
+            self._child_objs, self._child_offx, self._child_offy
+        ):
+            if _dbg:
+                logger.debug('%s %s %s', obj, offx, offy)
+
+            # Read each child's dimensions once; on a nested layout a
+            # property read may still recompute if it's dirty
+            w = obj.width
+            h = obj.height
             obj_posx = x + offx
-            obj_centerx = obj_posx + (obj.width // 2)
-            obj.render(renderer, P(obj_posx + centerx - obj_centerx, y + offy))
-            y += obj.height + offy
+            obj_centerx = obj_posx + (w // 2)
+            placed.append((obj, (obj_posx + centerx - obj_centerx, y + offy)))
+            y += h + offy
+
+        return placed
 
 
 class HLayout(Object):
+    __slots__ = ('align', )
+
     def __init__(self, align=Align.CENTER, **kwargs):
         super().__init__(**kwargs)
         self.align = align
 
+    def _prepare_self(self, renderer: Renderer):
+        # As in VLayout: children are already prepared, so this caches
+        # our dimensions bottom-up instead of recursing down the tree
+        _ = self.width
+        _ = self.height
+
     @property
     def width(self) -> int:
+        if not self._w_dirty:
+            return self._w
 
         self._w = 0
-        for (obj, offset) in self.children:
-            offx, _ = offset
+        for obj, offx in zip(self._child_objs, self._child_offx):
             self._w += obj.width + offx
 
+        self._w_dirty = False
         return self._w
 
     @width.setter
     def width(self, val):
         self._w = val
+        self._w_dirty = False
+        self._mark_ancestors_dirty()
 
     @property
     def height(self) -> int:
+        if not self._h_dirty:
+            return self._h
+
         self._h = 0
-        for (obj, offset) in self.children:
-            _, offy = offset
+        for obj, offy in zip(self._child_objs, self._child_offy):
             self._h = max(self._h, obj.height + offy)
 
+        self._h_dirty = False
         return self._h
 
     @height.setter
     def height(self, val):
         self._h = val
+        self._h_dirty = False
+        self._mark_ancestors_dirty()
 
-    def render(self, renderer: Renderer, pos=P(0, 0)):
+    def _render_self(self, renderer: Renderer, pos):
         x, y = pos
-        for (obj, offset) in self.children:
-            logger.debug('%s %s', obj, offset)
-            offx, offy = offset
-            obj.render(renderer, P(x + offx, y + offy))
-            x += obj.width + offx
+        _dbg = logger.isEnabledFor(logging.DEBUG)
+        placed = []
+        for obj, offx, offy in zip(
+            self._child_objs, self._child_offx, self._child_offy
+        ):
+            if _dbg:
+                logger.debug('%s %s %s', obj, offx, offy)
+            w = obj.width
+            placed.append((obj, (x + offx, y + offy)))
+            x += w + offx
+
+        return placed
 
 
 # TODO: width and height are actually one pixel larger than requested
 class Rectangle(Object):
-    def render(self, renderer: Renderer, pos=P(0, 0)):
+    __slots__ = ()
+
+    def _render_self(self, renderer: Renderer, pos):
         x, y = pos
         renderer.rectangle((x, y), (x + self._w, y + self._h), self.style)
-        super().render(renderer, pos)
+        return super()._render_self(renderer, pos)
 
 
 class Line(Object):
+    __slots__ = ('_start', '_end')
+
     # TODO: Support polar coordinates
     def __init__(self, *, end, start=P(0, 0), **kwargs):
         width = max(start.x, end.x)
         height = max(start.y, end.y)
         super().__init__(width=width, height=height, **kwargs)
 
-        self.start = start
-        self.end = end
+        self._start = start
+        self._end = end
 
-    def render(self, renderer: Renderer, pos=(0, 0)):
+    @property
+    def start(self) -> P:
+        return self._start
+
+    @start.setter
+    def start(self, val):
+        self._start = val
+        self._resize_to_endpoints()
+        self._endpoints_changed()
+
+    @property
+    def end(self) -> P:
+        return self._end
+
+    @end.setter
+    def end(self, val):
+        self._end = val
+        self._resize_to_endpoints()
+        self._endpoints_changed()
+
+    def _resize_to_endpoints(self):
+        # Route through the dimension setters so the mutation reaches
+        # every cached ancestor dimension and the canvas's op list
+        self.width = max(self._start.x, self._end.x)
+        self.height = max(self._start.y, self._end.y)
+
+    def _endpoints_changed(self):
+        pass
+
+    def _render_self(self, renderer: Renderer, pos):
         renderer.line(self.start + pos, self.end + pos, self.style)
 
 
@@ -244,18 +553,33 @@ class Line(Object):
 
 
 class TextBox(Rectangle):
+    __slots__ = ('_center_dirty', '_text_args')
+
     def __init__(self, text, align=Anchor.MIDDLE_MIDDLE, **kwargs):
         super().__init__(**kwargs)
+        self._center_dirty = False
+
+        # The Text child is built lazily at prepare/render time so that
+        # width/height assigned after construction don't force a rebuild
+        # of its centered position
+        self._text_args = (text, align)
+
+    def _build_text(self):
+        text, align = self._text_args
 
         pos = (0, 0)
         style = self.style
         if align == Anchor.MIDDLE_MIDDLE:
-            style = self.style._replace(anchor=Anchor.MIDDLE_MIDDLE)
-            pos = (self.width // 2, self.height // 2)
+            style = _replace_style(self.style, 'anchor', Anchor.MIDDLE_MIDDLE)
+            pos = (self._w // 2, self._h // 2)
 
-        self.add(
-            Text(text, style=style, width=self.width, height=self.height), pos
-        )
+        self.add(Text(text, style=style, width=self._w, height=self._h), pos)
+        self._center_dirty = False
+
+    def _prepare_self(self, renderer: Renderer):
+        if not self._child_objs:
+            self._build_text()
+            self._child_objs[0]._prepare_self(renderer)
 
     @property
     def width(self) -> int:
@@ -265,6 +589,8 @@ class TextBox(Rectangle):
     @width.setter
     def width(self, val):
         self._w = val
+        self._w_dirty = False
+        self._mark_ancestors_dirty()
 
     @property
     def height(self) -> int:
@@ -274,10 +600,27 @@ class TextBox(Rectangle):
     @height.setter
     def height(self, val):
         self._h = val
+        self._h_dirty = False
+        self._mark_ancestors_dirty()
 
-        # Recenter text
-        t, _ = self.children[0]
-        self.children[0] = (t, P(self.width // 2, self.height // 2))
+        # Recentering the text is deferred to render so that bulk
+        # height assignment (Table equalization) is a plain slot store.
+        # This relies on _mark_ancestors_dirty above: it invalidates the
+        # canvas's compiled op list, so a resize after a render is
+        # guaranteed another _render_self pass to resolve the flag.
+        self._center_dirty = True
+
+    def _render_self(self, renderer: Renderer, pos):
+        if not self._child_objs:
+            # Rendered without a prepare pass
+            self._build_text()
+
+        if self._center_dirty:
+            self._child_offx[0] = self._w // 2
+            self._child_offy[0] = self._h // 2
+            self._center_dirty = False
+
+        return super()._render_self(renderer, pos)
 
     # def prepare(self, renderer: Renderer):
     #     super().prepare(renderer)
@@ -285,73 +628,230 @@ class TextBox(Rectangle):
     #     t, _ = self.children[0]
     #     self.height = t.height
 
-    def render(self, renderer: Renderer, pos=P(0, 0)):
-        super().render(renderer, pos)
-
 
 class Table(HLayout):
+    __slots__ = ('_prepared', )
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-
-    def prepare(self, renderer: Renderer):
-        super().prepare(renderer)
-        self._h = 0
-        for (obj, _) in self.children:
-            self._h = max(self._h, obj.height)
-
-        # Set all cells to the same height
-        for (obj, _) in self.children:
-            obj.height = self._h
+        self._prepared = False
+
+    def _prepare_self(self, renderer: Renderer):
+        # add() re-marks the height dirty, so a clean flag on an already
+        # prepared table means the cells are still equalized and
+        # re-preparation is a no-op
+        if self._prepared and not self._h_dirty:
+            return
+
+        hmax = 0
+        for obj in self._child_objs:
+            h = obj.height
+            if h > hmax:
+                hmax = h
+        self._h = hmax
+        self._h_dirty = False
+
+        # Set all cells to the same height, skipping cells already there
+        for obj in self._child_objs:
+            if obj._h != hmax:
+                obj.height = hmax
+
+        # The height setters above re-dirtied our width; recompute it
+        # here so the getter never recurses during render
+        _ = self.width
+
+        self._prepared = True
+
+
+def _dash_points_py(sx, sy, ex, ey, dash_len):
+    dx = ex - sx
+    dy = ey - sy
+
+    # Axis-aligned lines (the common case in diagrams) need neither the
+    # sqrt nor the divisions; general lines divide once and multiply
+    if dx == 0:
+        length = abs(dy)
+        ux, uy = 0.0, 1.0
+    elif dy == 0:
+        length = abs(dx)
+        ux = 1.0 if dx > 0 else -1.0
+        uy = 0.0
+    else:
+        length = math.hypot(dx, dy)
+        inv = 1.0 / length
+        ux = dx * inv
+        uy = dy * inv
+
+    half = dash_len // 2
+    xs1 = []
+    ys1 = []
+    xs2 = []
+    ys2 = []
+    x = float(sx)
+    y = float(sy)
+    for _ in range(0, int(length), dash_len):
+        xs1.append(int(x))
+        ys1.append(int(y))
+        xs2.append(int(x + ux * half))
+        ys2.append(int(y + uy * half))
+        x += ux * dash_len
+        y += uy * dash_len
+
+    return xs1, ys1, xs2, ys2
+
+
+_dash_points = None
+
+
+def _get_dash_points():
+    # Generating dash endpoints is a pure numeric loop, so JIT-compile
+    # it with numba when available; numba is optional and imported
+    # lazily so it's only paid for when a DottedLine is rendered
+    global _dash_points
+    if _dash_points is None:
+        try:
+            import numba
+            import numpy as np
+
+            @numba.njit(cache=True)
+            def dash_points(sx, sy, ex, ey, dash_len):
+                dx = ex - sx
+                dy = ey - sy
+
+                if dx == 0:
+                    length = abs(dy)
+                    ux = 0.0
+                    uy = 1.0
+                elif dy == 0:
+                    length = abs(dx)
+                    ux = 1.0 if dx > 0 else -1.0
+                    uy = 0.0
+                else:
+                    length = math.hypot(dx, dy)
+                    inv = 1.0 / length
+                    ux = dx * inv
+                    uy = dy * inv
+
+                half = dash_len // 2
+                n = (int(length) + dash_len - 1) // dash_len
+                xs1 = np.empty(n, np.int32)
+                ys1 = np.empty(n, np.int32)
+                xs2 = np.empty(n, np.int32)
+                ys2 = np.empty(n, np.int32)
+                x = float(sx)
+                y = float(sy)
+                for i in range(n):
+                    xs1[i] = int(x)
+                    ys1[i] = int(y)
+                    xs2[i] = int(x + ux * half)
+                    ys2[i] = int(y + uy * half)
+                    x += ux * dash_len
+                    y += uy * dash_len
+
+                return xs1, ys1, xs2, ys2
+
+            _dash_points = dash_points
+        except ImportError:
+            _dash_points = _dash_points_py
+
+    return _dash_points
 
 
 class DottedLine(Line):
+    __slots__ = ('_dash_len', '_segments')
+
     def __init__(self, dash_len=10, **kwargs):
         super().__init__(**kwargs)
-        self.dash_len = dash_len
-
-    def render(self, renderer: Renderer, pos=P(0, 0)):
-        length = (
-            (self.end.x - self.start.x)**2 + (self.end.y - self.start.y)**2
-        )**0.5
-
-        if self.end.x != self.start.x:
-            u = (self.end - self.start) / length
-        else:
-            u = P(0, 1)
+        self._dash_len = dash_len
+        self._segments = None
 
-        xy1 = self.start + pos
-        for _ in range(0, int(length), self.dash_len):
-            xy2 = xy1 + (u * (self.dash_len // 2))
-            renderer.line(xy1, xy2, self.style)
-            xy1 = xy1 + u * self.dash_len
+    @property
+    def dash_len(self) -> int:
+        return self._dash_len
+
+    @dash_len.setter
+    def dash_len(self, val):
+        self._dash_len = val
+        self._segments = None
+        self._mark_ancestors_dirty()
+
+    def _endpoints_changed(self):
+        self._segments = None
+
+    def _compute_segments(self):
+        self._segments = _get_dash_points()(
+            self._start.x, self._start.y, self._end.x, self._end.y,
+            self._dash_len
+        )
+        return self._segments
+
+    # The endpoints are fixed unless start/end are reassigned, so the
+    # dash geometry is computed once and reused across renders
+    def _prepare_self(self, renderer: Renderer):
+        if self._segments is None:
+            self._compute_segments()
+
+    def _render_self(self, renderer: Renderer, pos):
+        segments = self._segments
+        if segments is None:
+            segments = self._compute_segments()
+
+        xs1, ys1, xs2, ys2 = segments
+        px, py = pos
+        n = len(xs1)
+        renderer.lines(
+            [(xs1[i] + px, ys1[i] + py) for i in range(n)],
+            [(xs2[i] + px, ys2[i] + py) for i in range(n)],
+            self.style,
+        )
 
 
 class Arrow(Line):
+    __slots__ = ('_double_sided', '_alen')
+
     def __init__(self, double_sided=False, arrow_length=10, **kwargs):
         super().__init__(**kwargs)
-        self.double_sided = double_sided
-        self.alen = arrow_length
+        self._double_sided = double_sided
+        self._alen = arrow_length
 
-    def render(self, renderer: Renderer, pos=P(0, 0)):
-        renderer.line(self.start + pos, self.end + pos, self.style)
+    @property
+    def double_sided(self) -> bool:
+        return self._double_sided
 
-        renderer.line(pos + self.end, pos + self.end - self.alen, self.style)
-        renderer.line(
-            pos + self.end, pos + self.end + P(-self.alen, self.alen),
-            self.style
-        )
+    @double_sided.setter
+    def double_sided(self, val):
+        self._double_sided = val
+        self._mark_ancestors_dirty()
 
-        if self.double_sided:
-            renderer.line(
-                pos + self.start, pos + self.start + P(self.alen, -self.alen),
-                self.style
-            )
-            renderer.line(
-                pos + self.start, pos + self.start + self.alen, self.style
-            )
+    @property
+    def alen(self) -> int:
+        return self._alen
+
+    @alen.setter
+    def alen(self, val):
+        self._alen = val
+        self._mark_ancestors_dirty()
+
+    def _render_self(self, renderer: Renderer, pos):
+        sx = self.start.x + pos[0]
+        sy = self.start.y + pos[1]
+        ex = self.end.x + pos[0]
+        ey = self.end.y + pos[1]
+        alen = self._alen
+
+        p1s = [(sx, sy), (ex, ey), (ex, ey)]
+        p2s = [(ex, ey), (ex - alen, ey - alen), (ex - alen, ey + alen)]
+
+        if self._double_sided:
+            p1s += [(sx, sy), (sx, sy)]
+            p2s += [(sx + alen, sy - alen), (sx + alen, sy + alen)]
+
+        renderer.lines(p1s, p2s, self.style)
 
 
 class Spacer(Object):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.width = self._w or self.style.padding
@@ -359,50 +859,153 @@ class Spacer(Object):
 
 
 class Text(Object):
+    __slots__ = ('_text', '_align', '_render_style')
+
     def __init__(self, text: str, align=Align.LEFT, **kwargs):
         super().__init__(**kwargs)
-        self.text = text
-        self.align = align
+        self._text = text
+        self._align = align
+        self._update_render_style()
 
-    # TODO: the width and height may be misleading if the text is anchored in the center
-    def prepare(self, renderer: Renderer):
-        super().prepare(renderer)
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, val):
+        self._text = val
+        self._mark_ancestors_dirty()
+
+    @property
+    def align(self) -> Align:
+        return self._align
+
+    @align.setter
+    def align(self, val):
+        self._align = val
+        self._update_render_style()
+        self._mark_ancestors_dirty()
+
+    def _update_render_style(self):
+        if self._align is Align.RIGHT:
+            self._render_style = _replace_style(
+                self.style, 'anchor', Anchor.TOP_RIGHT
+            )
+        else:
+            self._render_style = self.style
 
+    def _style_changed(self):
+        self._update_render_style()
+
+    # TODO: the width and height may be misleading if the text is anchored in the center
+    def _prepare_self(self, renderer: Renderer):
         if not self._w or not self._h:
-            _, _, right, bottom = renderer.text_bbox(self.text, self.style)
+            _, _, right, bottom = _cached_text_bbox(
+                renderer, self.text, self.style
+            )
             self.width = self._w or right
             self.height = self._h or bottom
 
-    def render(self, renderer: Renderer, pos=(0, 0)):
-        if self.align == "right":
+    def _render_self(self, renderer: Renderer, pos):
+        if self.align is Align.RIGHT:
             pos = pos + P(self.width, 0)
-            renderer.text(
-                self.text, pos, self.style._replace(anchor=Anchor.TOP_RIGHT)
-            )
-        else:
-            renderer.text(self.text, pos, self.style)
+
+        renderer.text(self.text, pos, self._render_style)
 
     def __str__(self):
         return f"{type(self).__name__}({repr(self.text)}, {self._w}, {self._h})"
 
 
 class Canvas(Object):
-    def render(self, renderer: Renderer, pos=P(0, 0)):
+    __slots__ = ('_ops', '_ops_pos', '_compiled_render')
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._ops = None
+        self._ops_pos = None
+        self._compiled_render = None
+
+    def render(self, renderer: Renderer, pos=(0, 0)):
+        # The flattened op list stays valid until the tree is mutated or
+        # the canvas moves, so repeated renders skip the traversal
+        # entirely. Every mutating path — add(), the width/height
+        # setters, Line endpoint reassignment, and the content setters
+        # (style, text, align, dash_len, double_sided, alen) — marks the
+        # ancestor chain dirty, which is what these flag checks key off.
+        if (
+            self._ops is None or self._w_dirty or self._h_dirty
+            or pos != self._ops_pos
+        ):
+            self._flatten(renderer, pos)
+            self._compile_ops()
+
+        self._compiled_render(renderer)
+
+        # TODO: Should we set the renderer dimensions before we call render?
+        renderer.set_dimensions((self._w, self._h))
+
+    def _compile_ops(self):
+        # Partial evaluation: once the tree is laid out the render is a
+        # fixed sequence of draw calls, so emit them as straight-line
+        # source and compile it. Coordinates and texts are inlined as
+        # literals; styles are bound in the function's globals.
+        ns = {'Point': P}
+        style_names: dict = {}
+        src = [
+            'def _render_ops(r):',
+            '    rectangle = r.rectangle',
+            '    text = r.text',
+            '    line = r.line',
+            '    lines = r.lines',
+        ]
+        for i, (op, p1, p2, style, payload) in enumerate(self._ops):
+            name = style_names.get(id(style))
+            if name is None:
+                name = f's{len(style_names)}'
+                style_names[id(style)] = name
+                ns[name] = style
+
+            if op == _OP_RECT:
+                src.append(f'    rectangle({p1!r}, {p2!r}, {name})')
+            elif op == _OP_TEXT:
+                src.append(f'    text({payload!r}, {p1!r}, {name})')
+            elif op == _OP_LINES:
+                # Endpoint batches are bound as constants rather than
+                # inlined; they can be long and may hold numpy scalars
+                a = f'a{i}'
+                b = f'b{i}'
+                ns[a] = p1
+                ns[b] = p2
+                src.append(f'    lines({a}, {b}, {name})')
+            else:
+                src.append(f'    line({p1!r}, {p2!r}, {name})')
+
+        exec(compile('\n'.join(src), '<layout codegen>', 'exec'), ns)
+        self._compiled_render = ns['_render_ops']
+
+    def _flatten(self, renderer: Renderer, pos):
+        ops: list = []
         self.width = self.style.padding
         self.height = self.style.padding
-        pos = pos + self.style.padding
-        for (obj, offset) in self.children:
-            logger.debug('%s %s', obj, offset)
+        px = pos[0] + self.style.padding
+        py = pos[1] + self.style.padding
+        _dbg = logger.isEnabledFor(logging.DEBUG)
+        for obj, offx, offy in zip(
+            self._child_objs, self._child_offx, self._child_offy
+        ):
+            if _dbg:
+                logger.debug('%s %s %s', obj, offx, offy)
             obj.prepare(renderer)
-            obj.render(renderer, pos + offset)
+            obj.flatten(renderer, ops, (px + offx, py + offy))
 
             # TODO: This only works for one object
-            x, y = offset + pos
-            self.width = max(self.width, obj.width + x)
-            self.height = max(self.height, obj.height + y)
+            ow = obj.width
+            oh = obj.height
+            self.width = max(self._w, ow + px + offx)
+            self.height = max(self._h, oh + py + offy)
 
         self.width += self.style.padding
         self.height += self.style.padding
 
-        # TODO: Should we set the renderer dimensions before we call render?
-        renderer.set_dimensions((self.width, self.height))
+        self._ops = ops
+        self._ops_pos = pos
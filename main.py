@@ -20,8 +20,8 @@ from PIL.ImageFont import FreeTypeFont
 
 import layout
 from layout import (
-    Anchor, Arrow, Canvas, DottedLine, HLayout, Renderer, Spacer, Style, Table,
-    Text, TextBox, VLayout
+    Align, Anchor, Arrow, Canvas, DottedLine, HLayout, Renderer, Spacer, Style,
+    Table, Text, TextBox, VLayout
 )
 from point import Point as P
 
@@ -95,7 +95,7 @@ class PILRenderer(Renderer):
             p,
             text,
             font=font,
-            anchor=style.anchor,
+            anchor=Anchor._to_renderer[style.anchor],
             fill=style.font_color,
             align="center",
         )
@@ -109,6 +109,12 @@ class PILRenderer(Renderer):
         # logger.debug("Line: %s %s", p1, p2)
         self.draw.line([p1, p2], fill=style.stroke_color, width=1)
 
+    def lines(self, p1s, p2s, style):
+        draw_line = self.draw.line
+        fill = style.stroke_color
+        for p1, p2 in zip(p1s, p2s):
+            draw_line([p1, p2], fill=fill, width=1)
+
 
 ctx: Optional[RenderContext] = None
 default_style: Optional[Style] = None
@@ -276,7 +282,7 @@ def create_canvas(
 ) -> Canvas:
     c = Canvas()
 
-    v = VLayout(align="center")
+    v = VLayout(align=Align.CENTER)
 
     # Title
     logger.info("Laying out title")
@@ -295,8 +301,8 @@ def create_canvas(
         right_text = "LSB"
         fields.reverse()
 
-    lsb_msb.add(Text(left_text, width=750 * ctx.scale, align="left"))
-    lsb_msb.add(Text(right_text, width=750 * ctx.scale, align="right"))
+    lsb_msb.add(Text(left_text, width=750 * ctx.scale, align=Align.LEFT))
+    lsb_msb.add(Text(right_text, width=750 * ctx.scale, align=Align.RIGHT))
 
     v.add(lsb_msb)
     v.add(Spacer())